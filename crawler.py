@@ -1,16 +1,108 @@
+import asyncio
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
-from tools.utils import log
-from urllib.parse import urljoin
+from tools.utils import log, run_async
 
-def crawl_website(url: str, max_links: int = 50) -> dict:
-    """
-    Crawl the given website URL and return discovered structure.
-    Handles JS-heavy websites like React, Vue, Angular.
-    """
+# Injected into every page: memoizes querySelectorAll results by selector
+# string, and drops the cache whenever the DOM mutates.
+QSA_CACHE_JS = """(() => {
+  const cache = new Map();
+  let observer = null;
+  window.__qsa = s => {
+    if (!observer && document.documentElement) {
+      observer = new MutationObserver(() => cache.clear());
+      observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+    }
+    let r = cache.get(s);
+    if (!r) {
+      r = Array.from(document.querySelectorAll(s));
+      cache.set(s, r);
+    }
+    return r;
+  };
+})()"""
+
+# Walks the DOM once in the browser and returns everything the crawler needs,
+# instead of one CDP round-trip per attribute read.
+EXTRACT_JS = """({max}) => {
+  const q = window.__qsa || (s => Array.from(document.querySelectorAll(s)));
+  return {
+    links: q('a').slice(0, max).filter(a => a.getAttribute('href')).map(a => a.href),
+    buttons: q('button, input[type=button], input[type=submit]').slice(0, max).map(b => ({
+      tag: b.tagName,
+      text: b.innerText || '',
+      class: b.getAttribute('class'),
+      id: b.getAttribute('id')
+    })),
+    forms: q('form').map(f => ({
+      id: f.getAttribute('id'),
+      action: f.getAttribute('action')
+    })),
+    inputs: q('input, textarea').map(i => ({
+      type: i.getAttribute('type'),
+      name: i.getAttribute('name'),
+      placeholder: i.getAttribute('placeholder'),
+      id: i.getAttribute('id')
+    }))
+  };
+}"""
+
+# Resolves once the page has rendered something worth extracting
+HYDRATED_JS = "document.querySelectorAll('a,button,input,form,textarea').length > 0"
+
+# Heavy resources that are irrelevant to selector extraction. Stylesheets are
+# kept because innerText and visibility depend on computed styles.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+# Upper bound on distinct (method, url) requests kept per crawl
+MAX_NETWORK_REQUESTS = 200
+
+
+def _request_recorder(data: dict, cap: int = MAX_NETWORK_REQUESTS):
+    """Build a request listener that records each (method, url) once, up to `cap`."""
+    seen = set()
+
+    def _on_request(request):
+        if len(seen) >= cap:
+            return
+        key = (request.method, request.url)
+        if key in seen:
+            return
+        seen.add(key)
+        data["network_requests"].append({
+            "url": request.url,
+            "method": request.method,
+            "resource_type": request.resource_type
+        })
+
+    return _on_request
+
+
+def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
 
-    log(f"Starting crawl for: {url}")
 
-    data = {
+# Shared browser, launched lazily on first crawl and reused afterwards.
+# Sync Playwright objects only work on the thread that created them, so one
+# daemon thread owns the driver and browser, and crawl_website() hands its
+# work to it through _CRAWL_QUEUE. Callers may be on any thread (e.g. every
+# Streamlit script run); their crawls are serialized on the one browser.
+_CRAWL_QUEUE: "queue.Queue" = queue.Queue()
+_crawler_thread = None
+_crawler_lock = threading.Lock()
+
+
+def _empty_result(url: str) -> dict:
+    return {
         "url": url,
         "links": [],
         "forms": [],
@@ -20,93 +112,208 @@ def crawl_website(url: str, max_links: int = 50) -> dict:
         "screenshot": None
     }
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
 
-        # force desktop rendering for modern JS apps
-        context = browser.new_context(
-            viewport={"width": 1400, "height": 900},
-            java_script_enabled=True
-        )
+def _crawler_loop():
+    """Run queued crawls on this thread's browser until a None job arrives."""
+    playwright = None
+    browser = None
+    try:
+        while True:
+            job = _CRAWL_QUEUE.get()
+            if job is None:
+                break
+            future, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if browser is None or not browser.is_connected():
+                    if playwright is None:
+                        playwright = sync_playwright().start()
+                    browser = playwright.chromium.launch(headless=True)
+                future.set_result(_crawl_on_browser(browser, *args))
+            except BaseException as e:
+                future.set_exception(e)
+    finally:
+        try:
+            if browser is not None:
+                browser.close()
+            if playwright is not None:
+                playwright.stop()
+        except Exception:
+            pass
+
+
+def _ensure_crawler_thread():
+    global _crawler_thread
+    with _crawler_lock:
+        if _crawler_thread is None or not _crawler_thread.is_alive():
+            _crawler_thread = threading.Thread(
+                target=_crawler_loop, name="qa-crawler", daemon=True
+            )
+            _crawler_thread.start()
+
 
+@atexit.register
+def _close_browser():
+    """Ask the crawler thread to close the browser and driver, then wait for it."""
+    with _crawler_lock:
+        thread = _crawler_thread
+    if thread is None or not thread.is_alive():
+        return
+    _CRAWL_QUEUE.put(None)
+    thread.join(timeout=30)
+
+
+def crawl_website(url: str, max_links: int = 50, screenshot: bool = False) -> dict:
+    """
+    Crawl the given website URL and return discovered structure.
+    Handles JS-heavy websites like React, Vue, Angular.
+    Pass screenshot=True to also save a viewport JPEG (homepage.jpg) for reports.
+    """
+    _ensure_crawler_thread()
+    future: Future = Future()
+    _CRAWL_QUEUE.put((future, (url, max_links, screenshot)))
+    return future.result()
+
+
+def _crawl_on_browser(browser, url: str, max_links: int, screenshot: bool) -> dict:
+    """crawl_website() body; runs on the crawler thread that owns `browser`."""
+
+    log(f"Starting crawl for: {url}")
+
+    data = _empty_result(url)
+
+    # force desktop rendering for modern JS apps
+    context = browser.new_context(
+        viewport={"width": 1400, "height": 900},
+        java_script_enabled=True
+    )
+
+    try:
         # capture network requests for API testing later
-        context.on("request", lambda request: data["network_requests"].append({
-            "url": request.url,
-            "method": request.method,
-            "resource_type": request.resource_type
-        }))
+        context.on("request", _request_recorder(data))
+
+        # skip images/fonts/media; they only slow down the load
+        context.route("**/*", _block_heavy_resources)
+        context.add_init_script(QSA_CACHE_JS)
 
         page = context.new_page()
 
         try:
-            # wait for full JS rendering
-            page.goto(url, wait_until="networkidle", timeout=40000)
+            # DOMContentLoaded is enough to start; networkidle fires late on chatty apps
+            page.goto(url, wait_until="domcontentloaded", timeout=15000)
         except Exception as e:
             log(f"Page load error: {e}")
-            browser.close()
             return data
 
-        # extra buffer for React/Vue hydration
-        page.wait_for_timeout(3000)
-
-        # screenshot for report
-        screenshot_path = "homepage.png"
-        page.screenshot(path=screenshot_path)
-        data["screenshot"] = screenshot_path
-
-        # extract links (JS sites sometimes attach href later)
+        # wait for the load event; stalled third-party scripts can hold it back
         try:
-            link_elements = page.query_selector_all("a")
-            for link in link_elements[:max_links]:
-                href = link.get_attribute("href")
-                if not href:
-                    continue
-                full_link = urljoin(url, href)
-                data["links"].append(full_link)
+            page.wait_for_load_state("load", timeout=8000)
         except Exception as e:
-            log(f"Error extracting links: {e}")
+            log(f"Load event wait timed out, continuing: {e}")
 
-        # extract buttons
+        # wait for React/Vue hydration to render interactive elements
         try:
-            button_elements = page.query_selector_all(
-                "button, input[type=button], input[type=submit]"
-            )
-            for btn in button_elements[:max_links]:
-                data["buttons"].append({
-                    "tag": btn.evaluate("el => el.tagName"),
-                    "text": btn.inner_text() or "",
-                    "class": btn.get_attribute("class"),
-                    "id": btn.get_attribute("id"),
-                })
+            page.wait_for_function(HYDRATED_JS, timeout=5000)
         except Exception as e:
-            log(f"Error extracting buttons: {e}")
+            log(f"Hydration wait timed out, continuing: {e}")
 
-        # extract forms
+        # optional screenshot for report (layout only, images are blocked)
+        if screenshot:
+            screenshot_path = "homepage.jpg"
+            try:
+                page.screenshot(path=screenshot_path, type="jpeg", quality=60, full_page=False)
+                data["screenshot"] = screenshot_path
+            except Exception as e:
+                log(f"Screenshot failed: {e}")
+
+        # extract links, buttons, forms and inputs in a single round-trip
         try:
-            form_elements = page.query_selector_all("form")
-            for form in form_elements:
-                data["forms"].append({
-                    "id": form.get_attribute("id"),
-                    "action": form.get_attribute("action")
-                })
+            data.update(page.evaluate(EXTRACT_JS, {"max": max_links}))
         except Exception as e:
-            log(f"Error extracting forms: {e}")
+            log(f"Error extracting page structure: {e}")
+    finally:
+        # close only the context; the browser is reused by later crawls
+        context.close()
+
+    log(f"Finished crawling: {len(data['links'])} links, {len(data['buttons'])} buttons, {len(data['inputs'])} inputs")
+
+    return data
+
+
+async def _block_heavy_resources_async(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _crawl_one(browser, url: str, sem: asyncio.Semaphore, max_links: int) -> dict:
+    """
+    Async counterpart of crawl_website used by crawl_websites().
+    No screenshot is taken, since parallel crawls would share one file.
+    """
+    data = _empty_result(url)
+
+    async with sem:
+        log(f"Starting crawl for: {url}")
+
+        context = await browser.new_context(
+            viewport={"width": 1400, "height": 900},
+            java_script_enabled=True
+        )
 
-        # extract input fields
         try:
-            input_elements = page.query_selector_all("input, textarea")
-            for inp in input_elements:
-                data["inputs"].append({
-                    "type": inp.get_attribute("type"),
-                    "name": inp.get_attribute("name"),
-                    "placeholder": inp.get_attribute("placeholder"),
-                    "id": inp.get_attribute("id")
-                })
-        except Exception as e:
-            log(f"Error extracting inputs: {e}")
+            context.on("request", _request_recorder(data))
+            await context.route("**/*", _block_heavy_resources_async)
+            await context.add_init_script(QSA_CACHE_JS)
 
-        browser.close()
+            page = await context.new_page()
 
-    log(f"Finished crawling: {len(data['links'])} links, {len(data['buttons'])} buttons, {len(data['inputs'])} inputs")
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+            except Exception as e:
+                log(f"Page load error for {url}: {e}")
+                return data
+
+            try:
+                await page.wait_for_load_state("load", timeout=8000)
+            except Exception as e:
+                log(f"Load event wait timed out for {url}, continuing: {e}")
+
+            try:
+                await page.wait_for_function(HYDRATED_JS, timeout=5000)
+            except Exception as e:
+                log(f"Hydration wait timed out for {url}, continuing: {e}")
+
+            try:
+                data.update(await page.evaluate(EXTRACT_JS, {"max": max_links}))
+            except Exception as e:
+                log(f"Error extracting page structure for {url}: {e}")
+        finally:
+            await context.close()
+
+    log(f"Finished crawling {url}: {len(data['links'])} links, {len(data['buttons'])} buttons, {len(data['inputs'])} inputs")
 
     return data
+
+
+async def _crawl_many(urls: List[str], max_concurrency: int, max_links: int) -> List[dict]:
+    sem = asyncio.Semaphore(max_concurrency)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            return await asyncio.gather(
+                *[_crawl_one(browser, url, sem, max_links) for url in urls]
+            )
+        finally:
+            await browser.close()
+
+
+def crawl_websites(urls: List[str], max_concurrency: int = 5, max_links: int = 50) -> List[dict]:
+    """
+    Crawl several URLs concurrently on one shared browser.
+    Returns one result dict per URL, in input order (same shape as crawl_website).
+    Safe to call after crawl_website() on the same thread.
+    """
+    return run_async(_crawl_many(list(urls), max_concurrency, max_links))
@@ -1,5 +1,6 @@
 import json
 import os
+import tempfile
 from getpass import getpass
 from tools.utils import log
 
@@ -23,16 +24,37 @@ def interactive_setup():
 
 
 def save_credentials(username: str, password: str):
-    with open(CRED_FILE, "w") as f:
-        json.dump({"username": username, "password": password}, f, indent=2)
+    # write to a temp file and swap it in, so readers never see a partial file
+    cred_dir = os.path.dirname(os.path.abspath(CRED_FILE))
+    fd, tmp_path = tempfile.mkstemp(dir=cred_dir, prefix=".creds-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"username": username, "password": password}, f, indent=2)
+        os.replace(tmp_path, CRED_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Parsed credentials, reused until the file's mtime/size changes
+_cache = {"stamp": None, "data": None}
 
 
 def load_credentials():
-    if not os.path.exists(CRED_FILE):
+    try:
+        st = os.stat(CRED_FILE)
+    except FileNotFoundError:
         raise FileNotFoundError("Credential file not found. Run interactive setup.")
 
-    with open(CRED_FILE, "r") as f:
-        return json.load(f)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _cache["stamp"] != stamp:
+        with open(CRED_FILE, "rb") as f:
+            _cache["data"] = json.loads(f.read())
+        _cache["stamp"] = stamp
+
+    # hand out a copy so callers can't mutate the cached dict
+    return dict(_cache["data"])
 
 
 def get_credentials():
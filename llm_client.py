@@ -1,8 +1,11 @@
 # agents/llm_client.py
 
 import os
+from typing import Iterator
+import orjson
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tools.utils import log
 
 
@@ -20,6 +23,20 @@ BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 DEFAULT_MODEL = "meta-llama/llama-3.3-70b-instruct"
 
+# Keep-alive session shared by every OpenRouter caller (call_llm, the site
+# classifier, the test planner), so they reuse one pool and skip the TCP/TLS handshake.
+# Retries only cover connection failures (POST is not retried once the request has been sent)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+))
+SESSION.headers.update({
+    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+    "Content-Type": "application/json"
+})
+
 
 def call_llm(prompt: str, model: str = DEFAULT_MODEL) -> str:
     """
@@ -28,11 +45,6 @@ def call_llm(prompt: str, model: str = DEFAULT_MODEL) -> str:
 
     log(f"Calling OpenRouter model: {model}")
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
     payload = {
         "model": model,
         "messages": [
@@ -41,11 +53,7 @@ def call_llm(prompt: str, model: str = DEFAULT_MODEL) -> str:
         "temperature": 0.2
     }
 
-    response = requests.post(
-        BASE_URL,
-        headers=headers,
-        data=json.dumps(payload)
-    )
+    response = SESSION.post(BASE_URL, json=payload, timeout=60)
 
     if response.status_code != 200:
         raise RuntimeError(
@@ -58,3 +66,23 @@ def call_llm(prompt: str, model: str = DEFAULT_MODEL) -> str:
         return data["choices"][0]["message"]["content"]
     except Exception:
         return response.text
+
+
+def iter_stream_deltas(response) -> Iterator[str]:
+    """
+    Yield the content deltas of an OpenRouter SSE response (a request sent
+    with "stream": True), stopping at the [DONE] event.
+    """
+    for line in response.iter_lines():
+        # skip keep-alive comments (": OPENROUTER PROCESSING") and blank lines
+        if not line.startswith(b"data:"):
+            continue
+        payload = line[len(b"data:"):].strip()
+        if payload == b"[DONE]":
+            return
+        try:
+            delta = orjson.loads(payload)["choices"][0]["delta"].get("content")
+        except Exception:
+            continue
+        if delta:
+            yield delta
@@ -12,24 +12,38 @@ class LoginPage:
     def goto(self):
         self.page.goto(self.url)
 
-    def _fill_first_match(self, selectors, value):
+    def _visible_match(self, selectors):
+        # one lazy locator over the fallbacks; or_() keeps XPath and CSS apart
+        union = None
         for sel in selectors:
-            try:
-                self.page.fill(sel, value)
-                return True
-            except Exception:
-                continue
-        return False
+            loc = self.page.locator(sel)
+            union = loc if union is None else union.or_(loc)
+        return union.filter(visible=True).first
 
-    def _click_first_match(self, selectors):
+    def _act_on_first_match(self, selectors, action):
+        if not selectors:
+            return False
+        # common case: a single query over all fallbacks, hidden matches excluded
+        try:
+            action(self._visible_match(selectors))
+            return True
+        except Exception:
+            pass
+        # the union failed (bad selector, disabled match...): retry each in priority order
         for sel in selectors:
             try:
-                self.page.click(sel)
+                action(self._visible_match([sel]))
                 return True
             except Exception:
                 continue
         return False
 
+    def _fill_first_match(self, selectors, value):
+        return self._act_on_first_match(selectors, lambda loc: loc.fill(value, timeout=3000))
+
+    def _click_first_match(self, selectors):
+        return self._act_on_first_match(selectors, lambda loc: loc.click(timeout=3000))
+
     def login(self, username, password):
         self._fill_first_match(self.username_selectors, username)
         self._fill_first_match(self.password_selectors, password)
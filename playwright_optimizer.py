@@ -16,48 +16,18 @@ you want to refactor generated tests later.
 """
 
 import os
-from typing import List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from tools.utils import log
 
 MARKER = "## OPTIMIZED_BY_PLAYWRIGHT_OPTIMIZER"
 
+# One scan each: skip conditions, and the import the helpers are injected after
+_SKIP_RE = re.compile(re.escape(MARKER) + r"|def safe_fill\(|def safe_click\(")
+_IMPORT_RE = re.compile(r"^(from playwright\.sync_api import sync_playwright)", re.M)
 
-def _read_file(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
-
-
-def _write_file(path: str, content: str) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-
-def enhance_file(path: str, llm_enabled: bool = False, crawled_snippet: Optional[str] = None) -> bool:
-    """
-    Enhance a single Playwright test file in place.
-    Returns True if modified, False if skipped.
-    """
-    if not os.path.isfile(path):
-        raise FileNotFoundError(path)
-
-    code = _read_file(path)
-
-    # Already enhanced?
-    if MARKER in code:
-        log(f"[SKIPPED] {path} (already optimized)")
-        return False
-
-    # Only touch Playwright tests
-    if "from playwright.sync_api import" not in code:
-        log(f"[SKIPPED] {path} (no Playwright import)")
-        return False
-
-    # If helpers are already present, do nothing
-    if "def safe_fill(" in code or "def safe_click(" in code:
-        log(f"[SKIPPED] {path} (safe_* helpers already present)")
-        return False
-
-    helper_block = f"""
+HELPER_BLOCK = f"""
 {MARKER}
 # Safe wrappers injected by optimizer
 def safe_fill(page, selector, value, retries: int = 2):
@@ -83,12 +53,46 @@ def safe_click(page, selector, retries: int = 2):
 
 """
 
-    # Inject helpers right after the sync_playwright import
-    new_code = code.replace(
-        "from playwright.sync_api import sync_playwright",
-        "from playwright.sync_api import sync_playwright" + helper_block,
-        1,
-    )
+
+def _read_file(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write_file(path: str, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def enhance_file(path: str, llm_enabled: bool = False, crawled_snippet: Optional[str] = None) -> bool:
+    """
+    Enhance a single Playwright test file in place.
+    Returns True if modified, False if skipped.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+
+    return _enhance_existing_file(path)
+
+
+def _enhance_existing_file(path: str) -> bool:
+    """enhance_file() body, for callers that already know `path` is a file."""
+    code = _read_file(path)
+
+    # Already enhanced, or helpers already present?
+    found = _SKIP_RE.search(code)
+    if found:
+        if found.group() == MARKER:
+            log(f"[SKIPPED] {path} (already optimized)")
+        else:
+            log(f"[SKIPPED] {path} (safe_* helpers already present)")
+        return False
+
+    # Inject helpers right after the sync_playwright import (only touch Playwright tests)
+    new_code, count = _IMPORT_RE.subn(lambda m: m.group(1) + HELPER_BLOCK, code, count=1)
+    if count == 0:
+        log(f"[SKIPPED] {path} (no Playwright import)")
+        return False
 
     _write_file(path, new_code)
     log(f"[ENHANCED] {path}")
@@ -103,19 +107,24 @@ def enhance_folder(folder: str = "generated_tests", llm_enabled: bool = False, c
     if not os.path.isdir(folder):
         raise FileNotFoundError(folder)
 
-    files = [f for f in os.listdir(folder) if f.endswith(".py")]
-    files.sort()
+    # DirEntry caches the file type, so no extra stat per file
+    with os.scandir(folder) as it:
+        entries = [e for e in it if e.is_file() and e.name.endswith(".py")]
+    entries.sort(key=lambda e: e.name)
 
-    modified: List[str] = []
-
-    for fname in files:
-        path = os.path.join(folder, fname)
+    def _enhance(entry: os.DirEntry) -> Tuple[str, bool]:
         try:
-            _ = crawled_snippet_map.get(fname) if crawled_snippet_map else None
-            if enhance_file(path, llm_enabled=llm_enabled, crawled_snippet=None):
-                modified.append(path)
+            _ = crawled_snippet_map.get(entry.name) if crawled_snippet_map else None
+            return entry.path, _enhance_existing_file(entry.path)
         except Exception as e:
-            log(f"[OPTIMIZER] ERROR enhancing {path}: {e}")
+            log(f"[OPTIMIZER] ERROR enhancing {entry.path}: {e}")
+            return entry.path, False
+
+    # file reads/writes release the GIL, so threads overlap the disk I/O
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4)) as ex:
+        results = list(ex.map(_enhance, entries))
+
+    modified: List[str] = [path for path, ok in results if ok]
 
     log(f"[DONE] Enhanced {len(modified)} tests")
     return modified
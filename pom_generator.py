@@ -1,8 +1,14 @@
 # agents/pom_generator.py
 
 import os
+import re
 from tools.utils import log
 
+# Keyword matchers, compiled once
+_USERNAME_RE = re.compile(r"user|email|login")
+_PASSWORD_RE = re.compile(r"pass")
+_LOGIN_RE = re.compile(r"login|sign|submit", re.I)
+
 FALLBACK_LOGIN_BUTTONS = [
     "button[type='submit']",
     "input[type='submit']",
@@ -12,6 +18,49 @@ FALLBACK_LOGIN_BUTTONS = [
     "button:has-text('Submit')"
 ]
 
+# Static part of the generated LoginPage: everything after __init__
+_POM_METHODS = """
+    def goto(self):
+        self.page.goto(self.url)
+
+    def _visible_match(self, selectors):
+        # one lazy locator over the fallbacks; or_() keeps XPath and CSS apart
+        union = None
+        for sel in selectors:
+            loc = self.page.locator(sel)
+            union = loc if union is None else union.or_(loc)
+        return union.filter(visible=True).first
+
+    def _act_on_first_match(self, selectors, action):
+        if not selectors:
+            return False
+        # common case: a single query over all fallbacks, hidden matches excluded
+        try:
+            action(self._visible_match(selectors))
+            return True
+        except Exception:
+            pass
+        # the union failed (bad selector, disabled match...): retry each in priority order
+        for sel in selectors:
+            try:
+                action(self._visible_match([sel]))
+                return True
+            except Exception:
+                continue
+        return False
+
+    def _fill_first_match(self, selectors, value):
+        return self._act_on_first_match(selectors, lambda loc: loc.fill(value, timeout=3000))
+
+    def _click_first_match(self, selectors):
+        return self._act_on_first_match(selectors, lambda loc: loc.click(timeout=3000))
+
+    def login(self, username, password):
+        self._fill_first_match(self.username_selectors, username)
+        self._fill_first_match(self.password_selectors, password)
+        self._click_first_match(self.login_button_selectors)
+"""
+
 
 def _safe(selector: str) -> str:
     """Ensure selector is quoted safely inside Python source."""
@@ -32,13 +81,13 @@ def generate_login_page_object(crawled_data, output_folder="page_objects"):
 
     # detect selectors
     for inp in inputs:
-        name = inp.get("name", "").lower()
+        name = (inp.get("name", "") or "").lower()
         selector = inp.get("cssSelector") or inp.get("xpath") or inp.get("id") or ""
         selector = _safe(selector)
 
-        if "user" in name or "email" in name or "login" in name:
+        if _USERNAME_RE.search(name):
             username_sel = f'input[name="{name}"]' if not selector else selector
-        if "pass" in name:
+        if _PASSWORD_RE.search(name):
             password_sel = f'input[name="{name}"]' if not selector else selector
 
     # If inference failed, use generic selectors
@@ -52,12 +101,9 @@ def generate_login_page_object(crawled_data, output_folder="page_objects"):
 
     # Try to infer login button
     for btn in crawled_data.get("buttons", []):
-        label = str(btn.get("text", "")).lower()
-        selector = btn.get("cssSelector") or btn.get("xpath") or btn.get("id") or ""
-        selector = _safe(selector)
-
-        if any(x in label for x in ["login", "sign", "submit"]):
-            login_button = selector
+        text = str(btn.get("text", "") or "")
+        if _LOGIN_RE.search(text):
+            login_button = _safe(btn.get("cssSelector") or btn.get("xpath") or btn.get("id") or "")
             break
 
     # Final fallback list
@@ -68,47 +114,24 @@ def generate_login_page_object(crawled_data, output_folder="page_objects"):
 
     button_candidates = list(dict.fromkeys(button_candidates))  # remove duplicates
 
-    pom_code = f"""
-class LoginPage:
-    def __init__(self, page):
-        self.page = page
-        self.url = "{url}"
-
-        # fallback selector pool
-        self.username_selectors = [{", ".join([repr(_safe(username_sel))])}]
-        self.password_selectors = [{", ".join([repr(_safe(password_sel))])}]
-        self.login_button_selectors = {button_candidates}
-
-    def goto(self):
-        self.page.goto(self.url)
-
-    def _fill_first_match(self, selectors, value):
-        for sel in selectors:
-            try:
-                self.page.fill(sel, value)
-                return True
-            except Exception:
-                continue
-        return False
-
-    def _click_first_match(self, selectors):
-        for sel in selectors:
-            try:
-                self.page.click(sel)
-                return True
-            except Exception:
-                continue
-        return False
-
-    def login(self, username, password):
-        self._fill_first_match(self.username_selectors, username)
-        self._fill_first_match(self.password_selectors, password)
-        self._click_first_match(self.login_button_selectors)
-"""
+    parts = [
+        "",
+        "class LoginPage:",
+        "    def __init__(self, page):",
+        "        self.page = page",
+        f'        self.url = "{url}"',
+        "",
+        "        # fallback selector pool",
+        f"        self.username_selectors = [{repr(_safe(username_sel))}]",
+        f"        self.password_selectors = [{repr(_safe(password_sel))}]",
+        f"        self.login_button_selectors = {button_candidates}",
+        _POM_METHODS,
+    ]
+    content = "\n".join(parts).encode("utf-8")
 
     out_file = os.path.join(output_folder, "login_page.py")
-    with open(out_file, "w", encoding="utf-8") as f:
-        f.write(pom_code)
+    with open(out_file, "wb") as f:
+        f.write(content)
     log(f"Generated LoginPage POM at: {out_file}")
 
     return out_file
@@ -1,12 +1,14 @@
 # tools/selector_mapper.py
 
+import functools
+import re
 from tools.utils import log
 
 # -----------------------------
 # Universal fallback selectors
 # -----------------------------
 
-USERNAME_FALLBACKS = [
+USERNAME_FALLBACKS = (
     'input[name="username"]',
     'input[name*="user"]',
     'input[name*="login"]',
@@ -16,18 +18,18 @@ USERNAME_FALLBACKS = [
     'input[placeholder*="user"]',
     'input[placeholder*="email"]',
     'input[type="text"]:not([name*="search"])',
-]
+)
 
-PASSWORD_FALLBACKS = [
+PASSWORD_FALLBACKS = (
     'input[name="password"]',
     'input[type="password"]',
     'input[name*="pass"]',
     '#password',
     '.password',
     'input[placeholder*="pass"]',
-]
+)
 
-LOGIN_BUTTON_FALLBACKS = [
+LOGIN_BUTTON_FALLBACKS = (
     'button[type="submit"]',
     'input[type="submit"]',
     'button:has-text("Login")',
@@ -37,7 +39,13 @@ LOGIN_BUTTON_FALLBACKS = [
     'button[class*="login"]',
     'button[id*="login"]',
     '[type="submit"]',
-]
+)
+
+
+# Keyword matchers, compiled once
+_USERNAME_NAME_RE = re.compile(r"user|login|email")
+_USERNAME_PLACEHOLDER_RE = re.compile(r"user|email")
+_PASSWORD_NAME_RE = re.compile(r"pass")
 
 
 # -----------------------------
@@ -64,32 +72,51 @@ def _extract_buttons(crawled_data):
 # Username & password inference
 # -----------------------------
 
-def infer_login_selectors(crawled_data):
-    """
-    Attempt to infer username & password selectors from crawled data.
-    Fall back to universal selector lists if inference fails.
-    """
-    inputs = _extract_inputs(crawled_data)
+def _inputs_key(inputs):
+    """Hashable (name, type, placeholder) view of the crawled inputs; the only fields inference reads."""
+    return tuple(
+        (inp.get("name"), inp.get("type"), inp.get("placeholder"))
+        for inp in inputs
+        if isinstance(inp, dict)
+    )
 
+
+@functools.lru_cache(maxsize=64)
+def _infer_from_inputs(inputs_key):
+    """Cached inference over the tuple built by _inputs_key."""
     username = None
     password = None
 
-    for inp in inputs:
-        name = (inp.get("name", "") or "").lower()
-        inp_type = (inp.get("type", "") or "").lower()
-        placeholder = (inp.get("placeholder", "") or "").lower()
+    for raw_name, raw_type, raw_placeholder in inputs_key:
+        name = (raw_name or "").lower()
+        inp_type = (raw_type or "").lower()
+        placeholder = (raw_placeholder or "").lower()
 
         # Username inference
-        if username is None and any(k in name for k in ["user", "login", "email"]):
-            username = f'input[name="{inp.get("name")}"]'
-        elif username is None and ("user" in placeholder or "email" in placeholder):
-            username = f'input[placeholder="{inp.get("placeholder")}"]'
+        if username is None and _USERNAME_NAME_RE.search(name):
+            username = f'input[name="{raw_name}"]'
+        elif username is None and _USERNAME_PLACEHOLDER_RE.search(placeholder):
+            username = f'input[placeholder="{raw_placeholder}"]'
 
         # Password inference
         if password is None and inp_type == "password":
-            password = f'input[name="{inp.get("name")}"]' if inp.get("name") else "input[type='password']"
-        elif password is None and "pass" in name:
-            password = f'input[name="{inp.get("name")}"]'
+            password = f'input[name="{raw_name}"]' if raw_name else "input[type='password']"
+        elif password is None and _PASSWORD_NAME_RE.search(name):
+            password = f'input[name="{raw_name}"]'
+
+        if username is not None and password is not None:
+            break
+
+    return username, password
+
+
+def infer_login_selectors(crawled_data):
+    """
+    Attempt to infer username & password selectors from crawled data.
+    Fall back to universal selector lists if inference fails.
+    """
+    inputs = _extract_inputs(crawled_data)
+    username, password = _infer_from_inputs(_inputs_key(inputs))
 
     if username:
         log(f"[INFO] Inferred username selector: {username}")
@@ -1,7 +1,13 @@
 import os
 import json
-import requests
-from tools.utils import log
+import hashlib
+import asyncio
+from collections import Counter
+from typing import List, Optional
+from urllib.parse import urlparse
+import httpx
+from tools.utils import log, run_async
+from agents.llm_client import SESSION, iter_stream_deltas
 
 
 # ---------------------------------------------------------------------------
@@ -11,10 +17,15 @@ OPENROUTER_KEY = os.getenv("OPENROUTER_API_KEY")
 if not OPENROUTER_KEY:
     raise RuntimeError("OPENROUTER_API_KEY not set in environment variables.")
 
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
 
 # ---------------------------------------------------------------------------
 # JSON Extractor: pulls JSON from messy model outputs
 # ---------------------------------------------------------------------------
+_JSON_DECODER = json.JSONDecoder()
+
+
 def extract_json(text: str):
     """
     Extracts JSON from:
@@ -22,36 +33,67 @@ def extract_json(text: str):
     - plain JSON
     - JSON with extra whitespace
     - JSON with junk before/after
+
+    Decodes in place from the first '{' with raw_decode, which stops at the
+    matching close brace, so fences and trailing junk are never re-scanned.
     """
     text = text.strip()
 
-    # If model wrapped answer in ```json ``` blocks
-    if "```json" in text:
-        start = text.find("```json") + len("```json")
-        end = text.rfind("```")
-        text = text[start:end].strip()
+    reason = "no JSON object found"
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
+            return obj
+        except json.JSONDecodeError as e:
+            reason = e
+        # a stray '{' in leading prose; try the next candidate
+        start = text.find("{", start + 1)
 
-    # Try clean JSON load directly
-    try:
-        return json.loads(text)
-    except:
-        pass
-
-    # Last chance: find the first '{' and last '}'
-    try:
-        start = text.index("{")
-        end = text.rindex("}") + 1
-        return json.loads(text[start:end])
-    except Exception as e:
-        raise ValueError(f"JSON extraction failed: {e}\nRAW TEXT:\n{text}")
+    raise ValueError(f"JSON extraction failed: {reason}\nRAW TEXT:\n{text}")
 
 
 # ---------------------------------------------------------------------------
-# Classifier API call
+# Request / response helpers (shared by sync and async classifiers)
 # ---------------------------------------------------------------------------
-def classify_site(crawled_data: dict) -> dict:
-    log("Classifying website using Llama 3.3 70B via OpenRouter...")
+def _unique(values) -> list:
+    """Order-preserving dedupe that drops empty values."""
+    return list(dict.fromkeys(v for v in values if v))
 
+
+def _compact_for_llm(crawled_data: dict) -> dict:
+    """
+    Column-oriented summary of the crawl for the prompt: unique values and
+    counts instead of one object per element. Raw network requests are
+    reduced to unique (method, host + path prefix) endpoints.
+    """
+    links = crawled_data.get("links") or []
+    buttons = crawled_data.get("buttons") or []
+    inputs = crawled_data.get("inputs") or []
+    forms = crawled_data.get("forms") or []
+    requests_seen = crawled_data.get("network_requests") or []
+
+    endpoints = []
+    for req in requests_seen:
+        parsed = urlparse(req.get("url") or "")
+        prefix = "/".join(parsed.path.split("/")[:3])
+        endpoints.append(f"{req.get('method', 'GET')} {parsed.netloc}{prefix}")
+
+    return {
+        "url": crawled_data.get("url", ""),
+        "link_count": len(links),
+        "link_hosts": _unique(urlparse(link).netloc for link in links),
+        "button_texts": _unique((b.get("text") or "").strip()[:80] for b in buttons),
+        "input_types_hist": dict(Counter((i.get("type") or "text").lower() for i in inputs)),
+        "input_names": _unique(i.get("name") for i in inputs),
+        "input_placeholders": _unique(i.get("placeholder") for i in inputs),
+        "form_actions": _unique(f.get("action") or f.get("id") for f in forms),
+        "form_count": len(forms),
+        "network_endpoints": _unique(endpoints),
+    }
+
+
+def _build_request_body(crawled_data: dict) -> dict:
     prompt = f"""
 You are an expert QA engineer. Analyze the website structure and return ONLY a JSON object.
 
@@ -62,17 +104,10 @@ Required fields:
 - recommended_tests (list of objects)
 
 Website Data:
-{json.dumps(crawled_data, indent=2)}
+{json.dumps(_compact_for_llm(crawled_data), separators=(",", ":"))}
 """
 
-    # Prepare API call
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    body = {
+    return {
         "model": "meta-llama/llama-3.3-70b-instruct",
         "messages": [
             {"role": "system", "content": "Return ONLY JSON. No text outside JSON."},
@@ -81,12 +116,12 @@ Website Data:
         "temperature": 0,
     }
 
-    # Call the API
-    response = requests.post(url, headers=headers, json=body)
 
+def _parse_api_response(response) -> dict:
+    """Works with both requests and httpx responses."""
     try:
         raw = response.json()
-    except:
+    except Exception:
         return {
             "error": "Invalid API response (not JSON)",
             "raw_response": response.text
@@ -112,3 +147,202 @@ Website Data:
             "raw_content": content,
             "raw_api": raw
         }
+
+
+class _ObjectScanner:
+    """
+    Incremental brace matcher for streamed model output. feed() takes each
+    new chunk and returns the start offsets of top-level {...} objects whose
+    closing brace has just arrived; braces inside JSON strings are ignored.
+    Each character is looked at once, however many chunks the reply spans.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.depth = 0
+        self.start = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> List[int]:
+        closed = []
+        for i, ch in enumerate(chunk):
+            if self.depth == 0:
+                if ch == "{":
+                    self.depth = 1
+                    self.start = self.offset + i
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    closed.append(self.start)
+        self.offset += len(chunk)
+        return closed
+
+
+def _read_streamed_response(response) -> dict:
+    """
+    Consume an OpenRouter SSE stream, returning as soon as the model's JSON
+    object is complete. Non-streamed replies (errors, or a provider that
+    ignored "stream") go through _parse_api_response.
+    """
+    content_type = response.headers.get("Content-Type", "")
+    if response.status_code != 200 or "text/event-stream" not in content_type:
+        return _parse_api_response(response)
+
+    chunks = []
+    scanner = _ObjectScanner()
+    for delta in iter_stream_deltas(response):
+        chunks.append(delta)
+        # decode only when a top-level object has closed, not on every '}'
+        for start in scanner.feed(delta):
+            try:
+                obj, _ = _JSON_DECODER.raw_decode("".join(chunks), start)
+                return obj
+            except json.JSONDecodeError:
+                # a stray {...} in leading prose; keep streaming
+                continue
+
+    content = "".join(chunks)
+    if not content:
+        return {"error": "Unexpected API response structure (empty stream)"}
+
+    try:
+        return extract_json(content)
+    except Exception as e:
+        return {
+            "error": "JSON parsing failed",
+            "reason": str(e),
+            "raw_content": content,
+        }
+
+
+# ---------------------------------------------------------------------------
+# On-disk result cache, keyed by a hash of the exact request body
+# ---------------------------------------------------------------------------
+CACHE_DIR = ".classify_cache"
+
+
+def _cache_path(body: dict) -> str:
+    key = hashlib.sha1(
+        json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _load_cached(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _store_cached(path: str, result: dict) -> None:
+    # never cache failures; the next run should retry the API
+    if not isinstance(result, dict) or "error" in result:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+    except OSError as e:
+        log(f"[WARN] Could not write classifier cache: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Classifier API call
+# ---------------------------------------------------------------------------
+def classify_site(crawled_data: dict) -> dict:
+    body = _build_request_body(crawled_data)
+
+    cache_path = _cache_path(body)
+    cached = _load_cached(cache_path)
+    if cached is not None:
+        log(f"Using cached classification: {cache_path}")
+        return cached
+
+    log("Classifying website using Llama 3.3 70B via OpenRouter...")
+
+    # Call the API over the shared llm_client session (streamed; we stop
+    # reading once the JSON object closes)
+    response = SESSION.post(
+        OPENROUTER_URL, json={**body, "stream": True}, timeout=60, stream=True
+    )
+
+    try:
+        result = _read_streamed_response(response)
+    finally:
+        response.close()
+
+    _store_cached(cache_path, result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Concurrent classification (HTTP/2, one multiplexed connection)
+# ---------------------------------------------------------------------------
+def _new_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=60,
+        limits=httpx.Limits(max_connections=8),
+        headers={
+            "Authorization": f"Bearer {OPENROUTER_KEY}",
+            "Content-Type": "application/json",
+        },
+    )
+
+
+async def classify_site_async(crawled_data: dict, client: Optional[httpx.AsyncClient] = None) -> dict:
+    """
+    Async variant of classify_site. Pass a shared client to multiplex several
+    classifications over one connection; otherwise a temporary one is used.
+    """
+    body = _build_request_body(crawled_data)
+
+    cache_path = _cache_path(body)
+    cached = _load_cached(cache_path)
+    if cached is not None:
+        log(f"Using cached classification: {cache_path}")
+        return cached
+
+    log(f"Classifying {crawled_data.get('url', '')} using Llama 3.3 70B via OpenRouter...")
+
+    if client is None:
+        async with _new_async_client() as own_client:
+            response = await own_client.post(OPENROUTER_URL, json=body)
+    else:
+        response = await client.post(OPENROUTER_URL, json=body)
+
+    result = _parse_api_response(response)
+    _store_cached(cache_path, result)
+    return result
+
+
+async def _classify_many(crawled_list: List[dict]) -> List[dict]:
+    async with _new_async_client() as client:
+        return await asyncio.gather(
+            *[classify_site_async(data, client=client) for data in crawled_list]
+        )
+
+
+def classify_sites(crawled_list: List[dict]) -> List[dict]:
+    """
+    Classify several crawled sites concurrently.
+    Returns one classification per input, in the same order.
+    Safe to call after crawl_website() on the same thread.
+    """
+    return run_async(_classify_many(list(crawled_list)))
@@ -0,0 +1,59 @@
+# tools/template_engine.py
+"""
+Thin rendering adapter for the code-generation templates in templates/.
+
+Prefers minijinja when installed: templates are parsed and executed in
+compiled Rust, so there is no Python-level dispatch per {{ }} / {% %} tag.
+Falls back to Jinja2 otherwise. Both backends use the same whitespace rules,
+so generated files are identical whichever one is active.
+"""
+
+import os
+from typing import Optional
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+_WHITESPACE = {
+    "trim_blocks": True,
+    "lstrip_blocks": True,
+    "keep_trailing_newline": True,
+}
+
+
+def _load_source(name: str) -> Optional[str]:
+    path = os.path.join(TEMPLATE_DIR, name)
+    if not os.path.isfile(path):
+        return None
+    # text mode normalizes CRLF, matching Jinja2's newline handling
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+try:
+    import minijinja
+
+    BACKEND = "minijinja"
+    _env = minijinja.Environment(
+        loader=_load_source,
+        auto_escape_callback=lambda name: False,
+        **_WHITESPACE,
+    )
+
+    def render(name: str, ctx: dict) -> str:
+        """Render templates/<name> with the given context."""
+        return _env.render_template(name, **ctx)
+
+except ImportError:
+    import jinja2
+
+    BACKEND = "jinja2"
+    _env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=False,
+        auto_reload=False,
+        **_WHITESPACE,
+    )
+
+    def render(name: str, ctx: dict) -> str:
+        """Render templates/<name> with the given context."""
+        return _env.get_template(name).render(**ctx)
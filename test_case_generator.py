@@ -1,23 +1,97 @@
 # agents/test_case_generator.py
 
 import os
-from typing import Dict, List
+import re
+import functools
+import string
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 from tools.utils import log
+from tools.template_engine import render
 from tools.selector_mapper import infer_login_selectors, infer_login_button_selector
 from agents.pom_generator import generate_login_page_object
 
+# ASCII translation table: [a-z0-9] kept, every other character becomes "_"
+_ALLOWED = set(string.ascii_lowercase + string.digits)
+_SLUG_TRANS = str.maketrans({
+    chr(cp): (chr(cp) if chr(cp) in _ALLOWED else "_") for cp in range(128)
+})
+_MULTI_US = re.compile(r"_+")
+_LOGIN_TOKEN_RE = re.compile(r"login|sign_?in|auth")
+
 
 def _slugify(name: str) -> str:
     """
     Turn a test name into a safe identifier like 'login_functionality_test'.
     """
-    import re
-    name = name.strip().lower()
-    name = re.sub(r"[^a-z0-9]+", "_", name)
-    name = re.sub(r"_+", "_", name).strip("_")
+    # non-ASCII characters are first turned into "?" so the table covers everything
+    name = name.strip().lower().encode("ascii", "replace").decode("ascii")
+    name = _MULTI_US.sub("_", name.translate(_SLUG_TRANS)).strip("_")
     return name or "test"
 
 
+_HEADER_PLACEHOLDER = "{TEST_HEADER}"
+_TEST_HEADER = (
+    "        # Test: {test_name}\n"
+    "        # Type: {test_type}\n"
+    "        # Description: {description}"
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _render_script_parts(
+    url: str,
+    uname_sel: str,
+    pwd_sel: str,
+    login_button_selector: str | None,
+    use_pom: bool,
+    is_login_like: bool,
+) -> Tuple[bytes, bytes]:
+    """
+    Render templates/playwright_test.py.j2 once per distinct script shape and
+    return it as pre-encoded UTF-8 (before, after) the per-test comment header.
+    """
+    body = render("playwright_test.py.j2", {
+        "test_url": url,
+        "test_header": _HEADER_PLACEHOLDER,
+        "use_pom": use_pom,
+        "is_login_like": is_login_like,
+        "uname_sel": uname_sel,
+        "pwd_sel": pwd_sel,
+        "login_button": login_button_selector,
+    })
+    before, after = body.split(_HEADER_PLACEHOLDER, 1)
+    return before.encode("utf-8"), after.encode("utf-8")
+
+
+def _write_chunks(path: str, chunks: List[bytes]) -> None:
+    """Write byte chunks to `path` with one writev() where available."""
+    with open(path, "wb") as f:
+        if not hasattr(os, "writev"):
+            for chunk in chunks:
+                f.write(chunk)
+            return
+
+        fd = f.fileno()
+        pending = list(chunks)
+        while pending:
+            written = os.writev(fd, pending)
+            # drop fully written chunks, trim a partially written one
+            while pending and written >= len(pending[0]):
+                written -= len(pending[0])
+                pending.pop(0)
+            if pending and written:
+                pending[0] = pending[0][written:]
+
+
+# (output key, source keys in priority order, default when all are missing/empty)
+_FIELD_MAP = (
+    ("test_name", ("test_name", "name"), "Unnamed Test"),
+    ("test_type", ("test_type", "type"), "functional"),
+    ("description", ("test_description", "description"), ""),
+)
+
+
 def _normalize_test_entry(entry: Dict) -> Dict:
     """
     Normalize whatever the classifier returns into a consistent test dict:
@@ -28,33 +102,17 @@ def _normalize_test_entry(entry: Dict) -> Dict:
       }
     Handles missing keys (like the ANY_LOGIN_SITE case).
     """
-    name = (
-        entry.get("test_name")
-        or entry.get("name")
-        or "Unnamed Test"
-    )
-    test_type = (
-        entry.get("test_type")
-        or entry.get("type")
-        or "functional"
-    )
-    description = (
-        entry.get("test_description")
-        or entry.get("description")
-        or ""
-    )
-
-    return {
-        "test_name": name,
-        "test_type": test_type,
-        "description": description,
-    }
+    out = {}
+    for key, sources, default in _FIELD_MAP:
+        out[key] = next((entry[s] for s in sources if entry.get(s)), default)
+    return out
 
 
 def _generate_single_playwright_script(
     test: Dict,
     crawled_data: Dict,
-    output_folder: str,
+    output_path: str,
+    is_login_like: bool,
     selectors: Dict[str, str],
     login_button_selector: str | None,
     use_pom: bool = True,
@@ -65,131 +123,30 @@ def _generate_single_playwright_script(
     - Uses TEST_URL from crawled_data["url"]
     - Uses TEST_USERNAME / TEST_PASSWORD env vars for login if it is a login-ish test
     - Optionally uses a LoginPage POM (recommended: use_pom=True)
+
+    output_path and is_login_like are resolved by the caller from the test's slug.
     """
 
     test_name = test["test_name"]
     test_type = test.get("test_type", "functional")
     description = test.get("description", "")
 
-    slug = _slugify(test_name)
-    file_name = f"{slug}_01.py"
-    output_path = os.path.join(output_folder, file_name)
-
     url = crawled_data.get("url", "")
 
-    is_login_like = any(
-        token in slug
-        for token in ["login", "sign_in", "signin", "auth"]
-    )
+    # direct selector mode (fallback) values; unused when use_pom=True
+    uname_sel = selectors.get("username") or "input[name='username'], #username, input[type='email']"
+    pwd_sel = selectors.get("password") or "input[name='password'], #password, input[type='password']"
 
-    # ---- body inside run_test() ----
-    if use_pom:
-        # We only have one LoginPage POM; we can still use it even on non-login tests,
-        # but we'll call login() only for login-like tests.
-        login_block = ""
-        if is_login_like:
-            login_block = """
-        # Try logging in with provided credentials
-        login_page.login(username, password)
-"""
-
-        body = f"""
-        page.goto(TEST_URL)
-
-        login_page = LoginPage(page)
-        login_page.goto(){login_block}
-"""
-        extra_imports = "from page_objects.login_page import LoginPage"
-    else:
-        # direct selector mode (fallback)
-        uname_sel = selectors.get("username") or "input[name='username'], #username, input[type='email']"
-        pwd_sel = selectors.get("password") or "input[name='password'], #password, input[type='password']"
-        body_login = ""
-        if is_login_like:
-            body_login = f"""
-        # Direct selector-based login attempt
-        safe_fill(page, \"{uname_sel}\", username)
-        safe_fill(page, \"{pwd_sel}\", password)
-"""
-            if login_button_selector:
-                body_login += f"""        safe_click(page, "{login_button_selector}")\n"""
-
-        body = f"""
-        page.goto(TEST_URL){body_login}
-"""
-        extra_imports = ""
-
-    # ---- full script ----
-    script_code = f"""# Auto-generated Playwright test
-from playwright.sync_api import sync_playwright
-import os
-import sys
+    # ---- full script: cached pre-encoded parts + per-test header comment ----
+    before, after = _render_script_parts(url, uname_sel, pwd_sel, login_button_selector, use_pom, is_login_like)
+    header = _TEST_HEADER.format(
+        test_name=test_name,
+        test_type=test_type,
+        description=description,
+    ).encode("utf-8")
 
-# Ensure project root is importable (for page_objects etc.)
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
-
-{extra_imports}
-
-TEST_URL = "{url}"
-
-
-def safe_fill(page, selector, value, retries: int = 2):
-    for i in range(retries + 1):
-        try:
-            page.fill(selector, value)
-            return
-        except Exception:
-            if i == retries:
-                raise
-            page.wait_for_timeout(300)
-
-
-def safe_click(page, selector, retries: int = 2):
-    for i in range(retries + 1):
-        try:
-            page.click(selector)
-            return
-        except Exception:
-            if i == retries:
-                raise
-            page.wait_for_timeout(300)
-
-
-def run_test():
-    username = os.getenv("TEST_USERNAME", "dummyuser")
-    password = os.getenv("TEST_PASSWORD", "dummypass")
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        # Test: {test_name}
-        # Type: {test_type}
-        # Description: {description}
-
-{body.rstrip()}
-
-        # Basic sanity: page loaded without fatal error
-        page.wait_for_load_state("load")
-
-        browser.close()
-
-
-if __name__ == "__main__":
-    try:
-        run_test()
-        print("TEST PASS")
-        sys.exit(0)
-    except Exception as e:
-        print("TEST FAIL:", e)
-        sys.exit(1)
-"""
-
-    os.makedirs(output_folder, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(script_code)
+    # the output folder is created once by generate_test_cases_and_playwright
+    _write_chunks(output_path, [before, header, after])
 
     return {
         "file": output_path,
@@ -245,18 +202,33 @@ def generate_test_cases_and_playwright(
     except Exception as e:
         log(f"[WARN] Failed to generate POM: {e}")
 
-    playwright_scripts: List[Dict] = []
+    # tests whose names slugify alike get _01, _02, ... instead of overwriting each other;
+    # paths are resolved up front so the writer threads below never share the counter
+    _seen: Dict[str, int] = {}
+    jobs: List[Tuple[Dict, str, bool]] = []
 
     for t in normalized_tests:
-        script_info = _generate_single_playwright_script(
+        slug = _slugify(t["test_name"])
+        idx = _seen.get(slug, 0) + 1
+        _seen[slug] = idx
+        output_path = os.path.join(write_scripts_to, f"{slug}_{idx:02d}.py")
+        jobs.append((t, output_path, bool(_LOGIN_TOKEN_RE.search(slug))))
+
+    def _generate(job: Tuple[Dict, str, bool]) -> Dict:
+        t, output_path, is_login_like = job
+        return _generate_single_playwright_script(
             t,
             crawled_data=crawled_data,
-            output_folder=write_scripts_to,
+            output_path=output_path,
+            is_login_like=is_login_like,
             selectors=selectors,
             login_button_selector=login_button_selector,
             use_pom=True,  # default: use POM if possible
         )
-        playwright_scripts.append(script_info)
+
+    # file writes release the GIL, so threads overlap the disk I/O; map() keeps test order
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as ex:
+        playwright_scripts: List[Dict] = list(ex.map(_generate, jobs))
 
     return {
         "test_suites": normalized_tests,
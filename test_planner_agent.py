@@ -1,7 +1,9 @@
 import os
 import json
-import requests
+import orjson
 from tools.utils import log
+from tools.template_engine import render
+from agents.llm_client import SESSION, iter_stream_deltas
 
 # Load OpenRouter key
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -20,6 +22,8 @@ HEADERS = {
 
 LLM_MODEL = "meta-llama/llama-3.3-70b-instruct"
 
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
 
 def generate_test_plan(classifier_output: dict) -> dict:
     """
@@ -28,73 +32,43 @@ def generate_test_plan(classifier_output: dict) -> dict:
 
     log("Generating test plan using Llama 3.3 70B...")
 
-    prompt = f"""
-You are a senior QA Test Manager. Based on the classifier output below:
-
-{json.dumps(classifier_output, indent=2)}
-
-Generate a highly detailed, structured test plan in STRICT JSON format:
-
-{{
-  "project_name": "",
-  "site_type": "",
-  "scope": {{
-      "in_scope": [],
-      "out_of_scope": []
-  }},
-  "test_types": [
-      {{
-        "name": "",
-        "objective": "",
-        "why_applicable": ""
-      }}
-  ],
-  "test_strategy": {{
-      "approach": "",
-      "tools": [],
-      "environments": [],
-      "data_strategy": ""
-  }},
-  "risk_analysis": {{
-      "risks": [],
-      "mitigations": []
-  }},
-  "prioritization": {{
-      "high": [],
-      "medium": [],
-      "low": []
-  }},
-  "entry_criteria": [],
-  "exit_criteria": [],
-  "assumptions": [],
-  "dependencies": []
-}}
-
-Rules:
-- JSON only. No backticks. No commentary.
-- Keep naming consistent and automation-ready.
-"""
+    prompt = render("test_plan_prompt.j2", {
+        "classifier_json": json.dumps(classifier_output, indent=2),
+    })
 
     body = {
         "model": LLM_MODEL,
-        "messages": [{"role": "user", "content": prompt}]
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True
     }
 
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
-        headers=HEADERS,
-        json=body
-    )
-
-    raw = response.text.strip()
+    # shared llm_client session; HEADERS adds the planner's referer/title
+    response = SESSION.post(OPENROUTER_URL, json=body, headers=HEADERS, stream=True, timeout=(5, 300))
 
     try:
-        resp_json = json.loads(raw)
-        content = resp_json["choices"][0]["message"]["content"]
-        return json.loads(content)
-
-    except Exception as e:
-        return {
-            "error": str(e),
-            "raw_response": raw
-        }
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code == 200 and "text/event-stream" in content_type:
+            raw = "".join(iter_stream_deltas(response)).strip()
+            try:
+                return orjson.loads(raw)
+            except Exception as e:
+                return {
+                    "error": str(e),
+                    "raw_response": raw
+                }
+
+        # error responses (and providers that ignore "stream") come back as plain JSON
+        raw = response.text.strip()
+
+        try:
+            resp_json = orjson.loads(raw)
+            content = resp_json["choices"][0]["message"]["content"]
+            return orjson.loads(content)
+
+        except Exception as e:
+            return {
+                "error": str(e),
+                "raw_response": raw
+            }
+    finally:
+        response.close()
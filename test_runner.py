@@ -2,9 +2,17 @@
 
 import os
 import sys
+import json
 import time
+import queue
+import signal
+import tempfile
+import threading
 import subprocess
-from typing import List, Dict
+from collections import deque
+from html import escape
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Deque, List, Dict, Optional, Tuple
 from tools.utils import log
 from tools.credential_manager import get_credentials
 
@@ -12,7 +20,28 @@ import sys
 sys.path.append(os.path.abspath("."))
 
 
-def run_playwright_test(file_path: str, creds: Dict, timeout: int = 120) -> Dict:
+# Lines of stdout/stderr kept in memory per stream; the full output goes to the log file
+TAIL_LINES = 1000
+
+
+def _drain(stream, tail: Deque[str], log_file, lock: threading.Lock, prefix: str) -> None:
+    """Copy a subprocess pipe line by line into a bounded tail and the log file."""
+    for line in stream:
+        tail.append(line.rstrip("\n"))
+        with lock:
+            log_file.write(prefix + line)
+    stream.close()
+
+
+def _build_test_env(creds: Dict) -> Dict[str, str]:
+    """Environment for test subprocesses: current env plus TEST_USERNAME / TEST_PASSWORD."""
+    env = os.environ.copy()
+    env["TEST_USERNAME"] = creds.get("username", "")
+    env["TEST_PASSWORD"] = creds.get("password", "")
+    return env
+
+
+def run_playwright_test(file_path: str, creds: Dict, timeout: int = 120, env: Optional[Dict[str, str]] = None) -> Dict:
     """
     Run a single Playwright test file using the current Python interpreter.
 
@@ -24,8 +53,9 @@ def run_playwright_test(file_path: str, creds: Dict, timeout: int = 120) -> Dict
       "flaky": bool,
       "exit_code": int | None,
       "duration_sec": float,
-      "stdout": "...",
-      "stderr": "..."
+      "stdout": "...",   # last TAIL_LINES lines
+      "stderr": "...",   # last TAIL_LINES lines
+      "log_file": "..."  # full output of all attempts
     }
     """
     start = time.time()
@@ -34,40 +64,72 @@ def run_playwright_test(file_path: str, creds: Dict, timeout: int = 120) -> Dict
 
     log(f"Running Playwright test: {test_file}")
 
-    env = os.environ.copy()
-    env["TEST_USERNAME"] = creds.get("username", "")
-    env["TEST_PASSWORD"] = creds.get("password", "")
+    # callers running many tests pass a prebuilt env instead of copying os.environ each time
+    if env is None:
+        env = _build_test_env(creds)
+
+    log_dir = os.path.join(os.path.dirname(test_file), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{test_id}.log")
 
-    def _run_once() -> Dict:
+    def _run_once(log_mode: str) -> Dict:
+        stdout_tail: Deque[str] = deque(maxlen=TAIL_LINES)
+        stderr_tail: Deque[str] = deque(maxlen=TAIL_LINES)
         try:
-            completed = subprocess.run(
-                [sys.executable, test_file],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                env=env,
-            )
+            with open(log_path, log_mode, encoding="utf-8") as log_file:
+                proc = subprocess.Popen(
+                    [sys.executable, test_file],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    bufsize=1,
+                    env=env,
+                )
+                lock = threading.Lock()
+                drains = [
+                    threading.Thread(target=_drain, args=(proc.stdout, stdout_tail, log_file, lock, ""), daemon=True),
+                    threading.Thread(target=_drain, args=(proc.stderr, stderr_tail, log_file, lock, "[stderr] "), daemon=True),
+                ]
+                for t in drains:
+                    t.start()
+
+                timed_out = False
+                try:
+                    returncode = proc.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    proc.kill()
+                    returncode = proc.wait()
+
+                for t in drains:
+                    t.join()
+
             duration = time.time() - start
-            status = "passed" if completed.returncode == 0 else "failed"
+            stdout = "\n".join(stdout_tail)
+            stderr = "\n".join(stderr_tail)
+
+            if timed_out:
+                return {
+                    "test_file": test_file,
+                    "test_id": test_id,
+                    "status": "error",
+                    "exit_code": None,
+                    "duration_sec": round(duration, 2),
+                    "stdout": stdout,
+                    "stderr": stderr + "\n[ERROR] Test timed out.",
+                    "log_file": log_path,
+                }
+
+            status = "passed" if returncode == 0 else "failed"
             return {
                 "test_file": test_file,
                 "test_id": test_id,
                 "status": status,
-                "exit_code": completed.returncode,
+                "exit_code": returncode,
                 "duration_sec": round(duration, 2),
-                "stdout": completed.stdout,
-                "stderr": completed.stderr,
-            }
-        except subprocess.TimeoutExpired as e:
-            duration = time.time() - start
-            return {
-                "test_file": test_file,
-                "test_id": test_id,
-                "status": "error",
-                "exit_code": None,
-                "duration_sec": round(duration, 2),
-                "stdout": e.stdout or "",
-                "stderr": (e.stderr or "") + "\n[ERROR] Test timed out.",
+                "stdout": stdout,
+                "stderr": stderr,
+                "log_file": log_path,
             }
         except Exception as e:
             duration = time.time() - start
@@ -79,16 +141,17 @@ def run_playwright_test(file_path: str, creds: Dict, timeout: int = 120) -> Dict
                 "duration_sec": round(duration, 2),
                 "stdout": "",
                 "stderr": f"[EXCEPTION] {repr(e)}",
+                "log_file": log_path,
             }
 
     # First run
-    first = _run_once()
+    first = _run_once("w")
     flaky = False
 
     # If failed, retry once to detect flakiness
     if first["status"] == "failed":
         log(f"Test {test_id} failed once, retrying to check flakiness...")
-        second = _run_once()
+        second = _run_once("a")
         if second["status"] == "passed":
             flaky = True
             first = second  # treat as passed but mark flaky
@@ -103,22 +166,9 @@ def run_playwright_test(file_path: str, creds: Dict, timeout: int = 120) -> Dict
 def _write_html_report(summary: Dict, report_path: str):
     """
     Write a very simple HTML report for the test run.
+    Rows are streamed straight to the file instead of building one big string.
     """
-    rows = []
-    for r in summary["results"]:
-        cls = "pass" if r["status"] == "passed" else "fail"
-        if r.get("flaky"):
-            cls = "flaky"
-        rows.append(
-            f"<tr class='{cls}'>"
-            f"<td>{r['test_id']}</td>"
-            f"<td>{r['status']}{' (flaky)' if r.get('flaky') else ''}</td>"
-            f"<td>{r['duration_sec']}</td>"
-            f"<td><pre>{(r['stderr'] or '').replace('<', '&lt;')}</pre></td>"
-            "</tr>"
-        )
-
-    html = f"""<!DOCTYPE html>
+    head = f"""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8" />
@@ -149,20 +199,130 @@ def _write_html_report(summary: Dict, report_path: str):
             <th>Duration (s)</th>
             <th>Details</th>
         </tr>
-        {''.join(rows)}
+        """
+    foot = """
     </table>
 </body>
 </html>
 """
+
     with open(report_path, "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(head)
+        for r in summary["results"]:
+            cls = "pass" if r["status"] == "passed" else "fail"
+            if r.get("flaky"):
+                cls = "flaky"
+            f.write(
+                f"<tr class='{cls}'>"
+                f"<td>{escape(r['test_id'])}</td>"
+                f"<td>{escape(r['status'])}{' (flaky)' if r.get('flaky') else ''}</td>"
+                f"<td>{r['duration_sec']}</td>"
+                f"<td><pre>{escape(r['stderr'] or '')}</pre></td>"
+                "</tr>"
+            )
+        f.write(foot)
 
     log(f"HTML report written to: {report_path}")
 
 
-def run_all_tests_in_folder(folder: str = "generated_tests") -> Dict:
+# Seconds to wait for the shared browser server to report its endpoint
+SERVER_START_TIMEOUT = 30
+
+
+def _read_endpoint(stream, found: queue.Queue) -> None:
+    """Hand the server's first stdout line to `found`, then keep draining the pipe."""
+    found.put(stream.readline().strip())
+    for _ in stream:
+        pass
+
+
+def _start_browser_server() -> Tuple[Optional[subprocess.Popen], Optional[str]]:
+    """
+    Launch one headless Chromium server shared by all generated tests.
+    Returns (process, ws_endpoint), or (None, None) if it could not start;
+    tests then fall back to launching their own browser.
+    """
+    fd, config_path = tempfile.mkstemp(prefix="pw-server-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"headless": True}, f)
+
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "playwright", "launch-server",
+             "--browser", "chromium", "--config", config_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            # own process group, so _stop_browser_server also reaches the node driver
+            start_new_session=True,
+        )
+        # the server prints its ws:// endpoint once it is listening; a reader
+        # thread keeps draining stdout afterwards so the pipe never fills up
+        found: queue.Queue = queue.Queue(maxsize=1)
+        threading.Thread(target=_read_endpoint, args=(proc.stdout, found), daemon=True).start()
+        try:
+            endpoint = found.get(timeout=SERVER_START_TIMEOUT)
+        except queue.Empty:
+            log(f"[WARN] Shared browser server still starting after {SERVER_START_TIMEOUT}s; giving up on it.")
+            endpoint = ""
+    except Exception as e:
+        log(f"[WARN] Could not start shared browser server: {e}")
+        return None, None
+    finally:
+        os.remove(config_path)
+
+    if not endpoint.startswith("ws"):
+        log("[WARN] Shared browser server did not report an endpoint; tests will launch their own browser.")
+        _stop_browser_server(proc)
+        return None, None
+
+    log(f"Shared browser server listening at: {endpoint}")
+    return proc, endpoint
+
+
+def _stop_browser_server(proc: Optional[subprocess.Popen], timeout: float = 10) -> None:
+    """
+    Stop the shared server. `python -m playwright` is only a wrapper around the
+    node driver, so terminating proc alone would leave node (and its Chromium)
+    running; the whole process group is signalled instead.
+    """
+    if proc is None:
+        return
+
+    if os.name != "posix":
+        # no process groups on Windows; /T takes down the whole tree
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        proc.wait()
+        return
+
+    try:
+        # SIGTERM lets the driver close Chromium, which runs in its own group
+        os.killpg(proc.pid, signal.SIGTERM)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            proc.poll()  # reap the wrapper so it does not keep the group alive
+            os.killpg(proc.pid, 0)
+            time.sleep(0.1)
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    proc.wait()
+
+
+def run_all_tests_in_folder(
+    folder: str = "generated_tests",
+    max_workers: Optional[int] = None,
+    shared_browser: bool = True,
+) -> Dict:
     """
     Discover and run all *.py tests under the given folder.
+    Tests run in parallel worker processes (default: one per CPU core) and,
+    with shared_browser=True, connect to one Chromium server via PW_WS_ENDPOINT
+    instead of each launching their own.
     Also writes an HTML report: test_report.html
     """
 
@@ -172,21 +332,41 @@ def run_all_tests_in_folder(folder: str = "generated_tests") -> Dict:
 
     log(f"Discovering tests in: {folder}")
 
-    test_files: List[str] = []
-    for name in os.listdir(folder):
-        if name.endswith(".py"):
-            test_files.append(os.path.join(folder, name))
-
-    test_files.sort()
+    with os.scandir(folder) as it:
+        test_files: List[str] = sorted(
+            e.path for e in it if e.is_file() and e.name.endswith(".py")
+        )
     log(f"Found {len(test_files)} test files.")
 
     creds = get_credentials()
+    env = _build_test_env(creds)
 
     results: List[Dict] = []
     passed = failed = errors = flaky_count = 0
 
-    for tf in test_files:
-        result = run_playwright_test(tf, creds=creds)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(test_files) or 1))
+    log(f"Running tests with {workers} worker(s).")
+
+    server = None
+    if shared_browser and test_files:
+        server, ws_endpoint = _start_browser_server()
+        if ws_endpoint:
+            env["PW_WS_ENDPOINT"] = ws_endpoint
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = {
+                ex.submit(run_playwright_test, tf, creds, env=env): idx
+                for idx, tf in enumerate(test_files)
+            }
+            ordered: Dict[int, Dict] = {}
+            for future in as_completed(futures):
+                ordered[futures[future]] = future.result()
+    finally:
+        _stop_browser_server(server)
+
+    for idx in range(len(test_files)):
+        result = ordered[idx]
         results.append(result)
 
         if result["status"] == "passed":
@@ -221,6 +401,12 @@ def run_all_tests_in_folder(folder: str = "generated_tests") -> Dict:
 
 
 if __name__ == "__main__":
-    res = run_all_tests_in_folder("generated_tests")
-    import json
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", "-f", default="generated_tests")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="parallel test workers (default: CPU count)")
+    parser.add_argument("--no-shared-browser", action="store_true", help="let every test launch its own browser")
+    args = parser.parse_args()
+
+    res = run_all_tests_in_folder(args.folder, max_workers=args.jobs, shared_browser=not args.no_shared_browser)
     print(json.dumps(res, indent=2))
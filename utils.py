@@ -1,15 +1,56 @@
+import asyncio
 import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(message)s"
-)
+# don't reconfigure logging when imported by an app that already set it up
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(levelname)s] %(message)s"
+    )
+
+_LOGGER = logging.getLogger("qa_agent")
+_INFO = logging.INFO
 
 def log(msg):
-    logging.info(msg)
+    # cheap level check first; formatting is deferred to the handler
+    if _LOGGER.isEnabledFor(_INFO):
+        _LOGGER.log(_INFO, "%s", msg)
+
+def run_async(coro):
+    """
+    asyncio.run() that also works on a thread where a loop is marked running.
+    Sync Playwright leaves its loop set as "running" on the calling thread for
+    as long as it is alive, so in that case the coroutine runs on a worker thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+# inner_text() per node, dropped automatically once the node is garbage collected
+_TEXT_CACHE = weakref.WeakKeyDictionary()
 
 def safe_text(node):
     try:
-        return node.inner_text().strip()
-    except:
+        cached = _TEXT_CACHE.get(node)
+    except TypeError:
+        # not hashable / weak-referenceable: no caching
+        cached = None
+    if cached is not None:
+        return cached
+
+    try:
+        text = node.inner_text()
+    except Exception:
         return ""
+    text = text.strip() if text else ""
+
+    try:
+        _TEXT_CACHE[node] = text
+    except TypeError:
+        pass
+    return text